@@ -294,6 +294,46 @@ def _test_rstudio_creds(server: api.PositServer):
         test_rstudio_server(server)
 
 
+def _bootstrap(server, insecure, cacert, jwt_keypath):
+    """
+    Create the initial admin user on a Connect server using a bootstrap JWT.
+
+    :param server: the server URL, which must include its scheme.
+    :param insecure: a flag noting whether TLS host/validation should be skipped.
+    :param cacert: the name of a CA certs file containing certificates to use.
+    :param jwt_keypath: the path to the secret key used to sign the JWT, or None to read it from the environment.
+    :return: the bootstrap output, containing the provisioned API key or the error returned by the server.
+    """
+    if not server.startswith("http"):
+        raise RSConnectException("Server URL expected to begin with transfer protocol (ex. http/https).")
+
+    secret_key = read_secret_key(jwt_keypath)
+    validate_hs256_secret_key(secret_key)
+
+    token_generator = TokenGenerator(secret_key)
+
+    bootstrap_token = token_generator.bootstrap()
+    logger.debug("Generated JWT:\n" + bootstrap_token)
+
+    logger.debug("Insecure: " + str(insecure))
+
+    ca_data = None
+    if cacert:
+        ca_data = read_certificate_file(cacert)
+
+    with cli_feedback("", stderr=True):
+        connect_server = RSConnectServer(
+            server, None, insecure=insecure, ca_data=ca_data, bootstrap_jwt=bootstrap_token
+        )
+        connect_client = RSConnectClient(connect_server)
+
+        response = connect_client.bootstrap()
+
+        # post-processing on response data
+        status, json_data = parse_client_response(response)
+        return produce_bootstrap_output(status, json_data)
+
+
 @cli.command(
     short_help="Create an initial admin user to bootstrap a Connect instance.",
     help="Creates an initial admin user to bootstrap a Connect instance. Returns the provisionend API key.",
@@ -337,39 +377,12 @@ def bootstrap(
     verbose,
 ):
     set_verbosity(verbose)
-    if not server.startswith("http"):
-        raise RSConnectException("Server URL expected to begin with transfer protocol (ex. http/https).")
-
-    secret_key = read_secret_key(jwt_keypath)
-    validate_hs256_secret_key(secret_key)
-
-    token_generator = TokenGenerator(secret_key)
-
-    bootstrap_token = token_generator.bootstrap()
-    logger.debug("Generated JWT:\n" + bootstrap_token)
-
-    logger.debug("Insecure: " + str(insecure))
-
-    ca_data = None
-    if cacert:
-        ca_data = read_certificate_file(cacert)
-
-    with cli_feedback("", stderr=True):
-        connect_server = RSConnectServer(
-            server, None, insecure=insecure, ca_data=ca_data, bootstrap_jwt=bootstrap_token
-        )
-        connect_client = RSConnectClient(connect_server)
-
-        response = connect_client.bootstrap()
-
-        # post-processing on response data
-        status, json_data = parse_client_response(response)
-        output = produce_bootstrap_output(status, json_data)
-        if raw:
-            click.echo(output["api_key"])
-        else:
-            json.dump(output, sys.stdout, indent=2)
-            sys.stdout.write("\n")
+    output = _bootstrap(server, insecure, cacert, jwt_keypath)
+    if raw:
+        click.echo(output["api_key"])
+    else:
+        json.dump(output, sys.stdout, indent=2)
+        sys.stdout.write("\n")
 
 
 # noinspection SpellCheckingInspection
@@ -1,7 +1,5 @@
-import tempfile
 from unittest import TestCase
 import pytest
-import json
 import jwt
 
 from datetime import datetime, timedelta, timezone
@@ -27,6 +25,7 @@ from rsconnect.json_web_token import (
 from tests.utils import (
     JWTDecoder,
     has_jwt_structure,
+    load_bootstrap_response,
 )
 
 
@@ -44,7 +43,6 @@ class TestJsonWebToken(TestCase):
     def setUp(self):
         # decoded copy of the base64-encoded key in testdata/jwt/secret.key
         self.secret_key = b"12345678901234567890123456789012345"
-        self.secret_key_b64 = b"MTIzNDU2Nzg5MDEyMzQ1Njc4OTAxMjM0NTY3ODkwMTIzNDU="
         # the environment variable version of the secret key will be stored as a string
         self.secret_key_b64_env = "MTIzNDU2Nzg5MDEyMzQ1Njc4OTAxMjM0NTY3ODkwMTIzNDU="
 
@@ -212,36 +210,28 @@ class TestJsonWebToken(TestCase):
         with pytest.raises(RSConnectException):
             produce_bootstrap_output(400, {"api_key": api_key})
 
-        expected_successful_result = json.loads(open("tests/testdata/initial-admin-responses/success.json", "r").read())
+        expected_successful_result = load_bootstrap_response("success")
         self.assertEqual(produce_bootstrap_output(200, {"api_key": api_key}), expected_successful_result)
 
-        expected_forbidden_result = json.loads(
-            open("tests/testdata/initial-admin-responses/forbidden_error.json", "r").read()
-        )
+        expected_forbidden_result = load_bootstrap_response("forbidden_error")
         self.assertEqual(produce_bootstrap_output(403, None), expected_forbidden_result)
         self.assertEqual(produce_bootstrap_output(403, {}), expected_forbidden_result)
         self.assertEqual(produce_bootstrap_output(403, {"api_key": ""}), expected_forbidden_result)
         self.assertEqual(produce_bootstrap_output(403, {"something": "else"}), expected_forbidden_result)
 
-        expected_unauthorized_error_result = json.loads(
-            open("tests/testdata/initial-admin-responses/unauthorized_error.json", "r").read()
-        )
+        expected_unauthorized_error_result = load_bootstrap_response("unauthorized_error")
         self.assertEqual(produce_bootstrap_output(401, None), expected_unauthorized_error_result)
         self.assertEqual(produce_bootstrap_output(401, {}), expected_unauthorized_error_result)
         self.assertEqual(produce_bootstrap_output(401, {"api_key": ""}), expected_unauthorized_error_result)
         self.assertEqual(produce_bootstrap_output(401, {"something": "else"}), expected_unauthorized_error_result)
 
-        expected_not_found_error_result = json.loads(
-            open("tests/testdata/initial-admin-responses/not_found_error.json", "r").read()
-        )
+        expected_not_found_error_result = load_bootstrap_response("not_found_error")
         self.assertEqual(produce_bootstrap_output(404, None), expected_not_found_error_result)
         self.assertEqual(produce_bootstrap_output(404, {}), expected_not_found_error_result)
         self.assertEqual(produce_bootstrap_output(404, {"api_key": ""}), expected_not_found_error_result)
         self.assertEqual(produce_bootstrap_output(404, {"something": "else"}), expected_not_found_error_result)
 
-        expected_other_error_result = json.loads(
-            open("tests/testdata/initial-admin-responses/other_error.json", "r").read()
-        )
+        expected_other_error_result = load_bootstrap_response("other_error")
         self.assertEqual(produce_bootstrap_output(500, None), expected_other_error_result)
         self.assertEqual(produce_bootstrap_output(500, {}), expected_other_error_result)
         self.assertEqual(produce_bootstrap_output(500, {"api_key": ""}), expected_other_error_result)
@@ -378,23 +368,17 @@ class TestJsonWebToken(TestCase):
 
         # BEGIN ACTUAL TEST
 
-        # Write the byte representation of the private key into a file
-        with tempfile.TemporaryDirectory() as td:
-            secret_keyfile = os.path.join(td, "secret_key")
-            with open(secret_keyfile, "wb") as f:
-                f.write(self.secret_key_b64)
+        # load the private key from the committed test keyfile
+        loaded_private_key = read_secret_key("tests/testdata/jwt/secret.key")
 
-            # load the private key
-            loaded_private_key = read_secret_key(secret_keyfile)
+        # generate a token
+        test_generator = TokenGenerator(loaded_private_key)
+        test_bootstrap_token = test_generator.bootstrap()
 
-            # generate a token
-            test_generator = TokenGenerator(loaded_private_key)
-            test_bootstrap_token = test_generator.bootstrap()
+        # decode the token
+        test_payload = decoder.decode_token(test_bootstrap_token)
 
-            # decode the token
-            test_payload = decoder.decode_token(test_bootstrap_token)
+        test_datetime = datetime.now(tz=timezone.utc)
 
-            test_datetime = datetime.now(tz=timezone.utc)
-
-            # assert we have a valid token
-            self.assert_bootstrap_jwt_is_valid(test_payload, test_datetime)
+        # assert we have a valid token
+        self.assert_bootstrap_jwt_is_valid(test_payload, test_datetime)
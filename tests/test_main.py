@@ -1,15 +1,14 @@
-import json
+import functools
 import os
-import shutil
 from os.path import join
-from unittest import TestCase
 
 
 import httpretty
+import orjson
 import pytest
 from click.testing import CliRunner
 
-from rsconnect.json_web_token import SECRET_KEY_ENV
+from rsconnect.json_web_token import SECRET_KEY_ENV, TokenGenerator
 
 from .utils import (
     apply_common_args,
@@ -21,8 +20,9 @@ from .utils import (
     require_api_key,
     require_connect,
     has_jwt_structure,
+    load_bootstrap_response,
 )
-from rsconnect.main import cli
+from rsconnect.main import _bootstrap, cli
 from rsconnect import VERSION
 
 
@@ -34,16 +34,93 @@ def _error_to_response(error):
     return [500, {}, str(error)]
 
 
+# register_uri() arguments for a successful JSON response
+_JSON_RESPONSE = {"adding_headers": {"Content-Type": "application/json"}, "status": 200}
+
+# Pre-signed bundle upload URL returned in create-bundle.json
+_BUNDLE_UPLOAD_URL = (
+    "https://lucid-uploads-staging.s3.amazonaws.com/bundles/application-8442/"
+    "6c9ed0d91ee9426687d9ac231d47dc83.tar.gz"
+    "?AWSAccessKeyId=theAccessKeyId"
+    "&Signature=dGhlU2lnbmF0dXJlCg%3D%3D"
+    "&content-md5=D1blMI4qTiI3tgeUOYXwkg%3D%3D"
+    "&content-type=application%2Fx-tar"
+    "&x-amz-security-token=dGhlVG9rZW4K"
+    "&Expires=1656715153"
+)
+
+# Test-only HS256 secret committed with the test data; it must never be used to sign real tokens
+_BOOTSTRAP_KEYPATH = "tests/testdata/jwt/secret.key"
+
+# Expected request bodies for the shinyapps.io / Posit Cloud deploy callbacks
+_EXPECTED_POST_APPLICATION = {"account": 82069, "name": "myapp", "template": "shiny"}
+_EXPECTED_POST_BUNDLE = {"application": 8442, "content_type": "application/x-tar"}
+_EXPECTED_POST_BUNDLE_STATUS = {"status": "ready"}
+_EXPECTED_POST_DEPLOY = {"bundle": 12640, "rebuild": False}
+
+
 def _load_json(data):
-    if isinstance(data, bytes):
-        return json.loads(data.decode())
-    return json.loads(data)
+    return orjson.loads(data)
+
+
+@functools.lru_cache(maxsize=None)
+def _fixture(path):
+    """
+    Returns the contents of a test data file, reading it from disk only once per test run.
+    """
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def _rstudio_response(name):
+    """
+    Returns the body of a canned shinyapps.io / Posit Cloud API response.
+    """
+    return _fixture(join("tests/testdata/rstudio-responses", name))
+
+
+def _register_all(entries):
+    """
+    Registers a batch of httpretty responses given as (method, uri, body, register_uri kwargs) tuples.
+    """
+    for method, uri, body, kwargs in entries:
+        httpretty.register_uri(method, uri, body=body, **kwargs)
+
+
+def _deploy_fixtures(api_url):
+    """
+    Returns the static (method, uri, body, register_uri kwargs) entries shared by the shinyapps.io and Posit Cloud
+    deploy tests for the API rooted at api_url. Responses that validate the request body are registered as callbacks
+    within each test.
+    """
+    return [
+        (httpretty.GET, api_url + "/users/me", _rstudio_response("get-user.json"), {"status": 200}),
+        (
+            httpretty.GET,
+            api_url + "/applications?filter=name:like:shinyapp&offset=0&count=100&use_advanced_filters=true",
+            _rstudio_response("get-applications.json"),
+            _JSON_RESPONSE,
+        ),
+        (httpretty.GET, api_url + "/accounts/", _rstudio_response("get-accounts.json"), _JSON_RESPONSE),
+        (httpretty.PUT, _BUNDLE_UPLOAD_URL, b"", {}),
+        (httpretty.GET, api_url + "/bundles/12640", _rstudio_response("get-accounts.json"), _JSON_RESPONSE),
+        (httpretty.GET, api_url + "/tasks/333", _rstudio_response("get-task.json"), _JSON_RESPONSE),
+    ]
+
+
+@pytest.fixture(scope="module")
+def runner():
+    """
+    A single CliRunner shared by every test in this module; each invoke sets up its own isolation.
+    """
+    return CliRunner()
 
 
 class TestMain:
-    def setup_method(self):
-        shutil.rmtree("test-home", ignore_errors=True)
-        os.environ["HOME"] = "test-home"
+    @pytest.fixture(autouse=True)
+    def scratch_home(self, tmp_path, monkeypatch):
+        # a fresh HOME per test, so server and app stores written by one test are never seen by the next
+        monkeypatch.setenv("HOME", str(tmp_path))
 
     @staticmethod
     def optional_target(default):
@@ -64,176 +141,102 @@ class TestMain:
         args.append(target)
         return args
 
-    def test_version(self):
-        runner = CliRunner()
-        result = runner.invoke(cli, ["version"])
+    def test_version(self, runner):
+        result = runner.invoke(cli, ["version"], catch_exceptions=False)
         assert result.exit_code == 0, result.output
         assert VERSION in result.output
 
-    def test_ping(self):
+    def test_ping(self, runner):
         connect_server = require_connect()
-        runner = CliRunner()
-        result = runner.invoke(cli, ["details", "-s", connect_server])
+        result = runner.invoke(cli, ["details", "-s", connect_server], catch_exceptions=False)
         assert result.exit_code == 0, result.output
         assert "OK" in result.output
 
-    def test_ping_api_key(self):
+    def test_ping_api_key(self, runner):
         connect_server = require_connect()
         api_key = require_api_key()
-        runner = CliRunner()
         args = ["details"]
         apply_common_args(args, server=connect_server, key=api_key)
-        result = runner.invoke(cli, args)
+        result = runner.invoke(cli, args, catch_exceptions=False)
         assert result.exit_code == 0, result.output
         assert "OK" in result.output
 
-    def test_deploy(self):
+    def test_deploy(self, runner):
         target = optional_target(get_dir(join("pip1", "dummy.ipynb")))
-        runner = CliRunner()
         args = self.create_deploy_args("notebook", target)
-        result = runner.invoke(cli, args)
+        result = runner.invoke(cli, args, catch_exceptions=False)
         assert result.exit_code == 0, result.output
 
     # noinspection SpellCheckingInspection
-    def test_deploy_manifest(self):
+    def test_deploy_manifest(self, runner):
         target = optional_target(get_manifest_path("shinyapp"))
-        runner = CliRunner()
         args = self.create_deploy_args("manifest", target)
-        result = runner.invoke(cli, args)
+        result = runner.invoke(cli, args, catch_exceptions=False)
         assert result.exit_code == 0, result.output
 
     # noinspection SpellCheckingInspection
     @httpretty.activate(verbose=True, allow_net_connect=False)
-    def test_deploy_manifest_shinyapps(self):
-        original_api_key_value = os.environ.pop("CONNECT_API_KEY", None)
-        original_server_value = os.environ.pop("CONNECT_SERVER", None)
+    def test_deploy_manifest_shinyapps(self, runner, monkeypatch):
+        monkeypatch.delenv("CONNECT_API_KEY", raising=False)
+        monkeypatch.delenv("CONNECT_SERVER", raising=False)
 
-        httpretty.register_uri(
-            httpretty.GET,
-            "https://api.shinyapps.io/v1/users/me",
-            body=open("tests/testdata/rstudio-responses/get-user.json", "r").read(),
-            status=200,
-        )
-        httpretty.register_uri(
-            httpretty.GET,
-            "https://api.shinyapps.io/v1/applications"
-            "?filter=name:like:shinyapp&offset=0&count=100&use_advanced_filters=true",
-            body=open("tests/testdata/rstudio-responses/get-applications.json", "r").read(),
-            adding_headers={"Content-Type": "application/json"},
-            status=200,
-        )
-        httpretty.register_uri(
-            httpretty.GET,
-            "https://api.shinyapps.io/v1/accounts/",
-            body=open("tests/testdata/rstudio-responses/get-accounts.json", "r").read(),
-            adding_headers={"Content-Type": "application/json"},
-            status=200,
-        )
+        _register_all(_deploy_fixtures("https://api.shinyapps.io/v1"))
 
         def post_application_callback(request, uri, response_headers):
             parsed_request = _load_json(request.body)
             try:
-                assert parsed_request == {"account": 82069, "name": "myapp", "template": "shiny"}
+                assert parsed_request == _EXPECTED_POST_APPLICATION
             except AssertionError as e:
                 return _error_to_response(e)
             return [
                 201,
                 {"Content-Type": "application/json"},
-                open("tests/testdata/rstudio-responses/create-application.json", "r").read(),
+                _rstudio_response("create-application.json"),
             ]
 
-        httpretty.register_uri(
-            httpretty.POST,
-            "https://api.shinyapps.io/v1/applications/",
-            body=post_application_callback,
-            status=200,
-        )
-
         def post_bundle_callback(request, uri, response_headers):
             parsed_request = _load_json(request.body)
             del parsed_request["checksum"]
             del parsed_request["content_length"]
             try:
-                assert parsed_request == {
-                    "application": 8442,
-                    "content_type": "application/x-tar",
-                }
+                assert parsed_request == _EXPECTED_POST_BUNDLE
             except AssertionError as e:
                 return _error_to_response(e)
             return [
                 201,
                 {"Content-Type": "application/json"},
-                open("tests/testdata/rstudio-responses/create-bundle.json", "r").read(),
+                _rstudio_response("create-bundle.json"),
             ]
 
-        httpretty.register_uri(
-            httpretty.POST,
-            "https://api.shinyapps.io/v1/bundles",
-            body=post_bundle_callback,
-        )
-
-        httpretty.register_uri(
-            httpretty.PUT,
-            "https://lucid-uploads-staging.s3.amazonaws.com/bundles/application-8442/"
-            "6c9ed0d91ee9426687d9ac231d47dc83.tar.gz"
-            "?AWSAccessKeyId=theAccessKeyId"
-            "&Signature=dGhlU2lnbmF0dXJlCg%3D%3D"
-            "&content-md5=D1blMI4qTiI3tgeUOYXwkg%3D%3D"
-            "&content-type=application%2Fx-tar"
-            "&x-amz-security-token=dGhlVG9rZW4K"
-            "&Expires=1656715153",
-            body="",
-        )
-
         def post_bundle_status_callback(request, uri, response_headers):
             parsed_request = _load_json(request.body)
             try:
-                assert parsed_request == {"status": "ready"}
+                assert parsed_request == _EXPECTED_POST_BUNDLE_STATUS
             except AssertionError as e:
                 return _error_to_response(e)
-            return [303, {"Location": "https://api.shinyapps.io/v1/bundles/12640"}, ""]
-
-        httpretty.register_uri(
-            httpretty.POST,
-            "https://api.shinyapps.io/v1/bundles/12640/status",
-            body=post_bundle_status_callback,
-        )
-
-        httpretty.register_uri(
-            httpretty.GET,
-            "https://api.shinyapps.io/v1/bundles/12640",
-            body=open("tests/testdata/rstudio-responses/get-accounts.json", "r").read(),
-            adding_headers={"Content-Type": "application/json"},
-            status=200,
-        )
+            return [303, {"Location": "https://api.shinyapps.io/v1/bundles/12640"}, b""]
 
         def post_deploy_callback(request, uri, response_headers):
             parsed_request = _load_json(request.body)
             try:
-                assert parsed_request == {"bundle": 12640, "rebuild": False}
+                assert parsed_request == _EXPECTED_POST_DEPLOY
             except AssertionError as e:
                 return _error_to_response(e)
             return [
                 303,
                 {"Location": "https://api.shinyapps.io/v1/tasks/333"},
-                open("tests/testdata/rstudio-responses/post-deploy.json", "r").read(),
+                _rstudio_response("post-deploy.json"),
             ]
 
-        httpretty.register_uri(
-            httpretty.POST,
-            "https://api.shinyapps.io/v1/applications/8442/deploy",
-            body=post_deploy_callback,
-        )
-
-        httpretty.register_uri(
-            httpretty.GET,
-            "https://api.shinyapps.io/v1/tasks/333",
-            body=open("tests/testdata/rstudio-responses/get-task.json", "r").read(),
-            adding_headers={"Content-Type": "application/json"},
-            status=200,
+        _register_all(
+            [
+                (httpretty.POST, "https://api.shinyapps.io/v1/applications/", post_application_callback, {}),
+                (httpretty.POST, "https://api.shinyapps.io/v1/bundles", post_bundle_callback, {}),
+                (httpretty.POST, "https://api.shinyapps.io/v1/bundles/12640/status", post_bundle_status_callback, {}),
+                (httpretty.POST, "https://api.shinyapps.io/v1/applications/8442/deploy", post_deploy_callback, {}),
+            ]
         )
 
-        runner = CliRunner()
         args = [
             "deploy",
             "manifest",
@@ -247,14 +250,8 @@ class TestMain:
             "--title",
             "myApp",
         ]
-        try:
-            result = runner.invoke(cli, args)
-            assert result.exit_code == 0, result.output
-        finally:
-            if original_api_key_value:
-                os.environ["CONNECT_API_KEY"] = original_api_key_value
-            if original_server_value:
-                os.environ["CONNECT_SERVER"] = original_server_value
+        result = runner.invoke(cli, args, catch_exceptions=False)
+        assert result.exit_code == 0, result.output
 
     @httpretty.activate(verbose=True, allow_net_connect=False)
     @pytest.mark.parametrize(
@@ -262,55 +259,42 @@ class TestMain:
         [(None, None), ("444", 555)],
         ids=["without associated project", "with associated project"],
     )
-    def test_deploy_manifest_cloud(self, project_application_id, project_id):
-        original_api_key_value = os.environ.pop("CONNECT_API_KEY", None)
-        original_server_value = os.environ.pop("CONNECT_SERVER", None)
+    def test_deploy_manifest_cloud(self, runner, monkeypatch, project_application_id, project_id):
+        monkeypatch.delenv("CONNECT_API_KEY", raising=False)
+        monkeypatch.delenv("CONNECT_SERVER", raising=False)
         if project_application_id:
-            os.environ["LUCID_APPLICATION_ID"] = project_application_id
+            monkeypatch.setenv("LUCID_APPLICATION_ID", project_application_id)
 
+        _register_all(_deploy_fixtures("https://api.posit.cloud/v1"))
         httpretty.register_uri(
             httpretty.GET,
-            "https://api.posit.cloud/v1/users/me",
-            body=open("tests/testdata/rstudio-responses/get-user.json", "r").read(),
-            status=200,
-        )
-        httpretty.register_uri(
-            httpretty.GET,
-            "https://api.posit.cloud/v1/applications"
-            "?filter=name:like:shinyapp&offset=0&count=100&use_advanced_filters=true",
-            body=open("tests/testdata/rstudio-responses/get-applications.json", "r").read(),
-            adding_headers={"Content-Type": "application/json"},
-            status=200,
-        )
-        httpretty.register_uri(
-            httpretty.GET,
-            "https://api.posit.cloud/v1/accounts/",
-            body=open("tests/testdata/rstudio-responses/get-accounts.json", "r").read(),
-            adding_headers={"Content-Type": "application/json"},
-            status=200,
+            "https://api.posit.cloud/v1/applications/8442",
+            body=_rstudio_response("get-output-application.json"),
+            **_JSON_RESPONSE,
         )
 
         if project_application_id:
-            httpretty.register_uri(
-                httpretty.GET,
-                "https://api.posit.cloud/v1/applications/444",
-                body=open("tests/testdata/rstudio-responses/get-project-application.json", "r").read(),
-                adding_headers={"Content-Type": "application/json"},
-                status=200,
-            )
-            httpretty.register_uri(
-                httpretty.GET,
-                "https://api.posit.cloud/v1/content/555",
-                body=open("tests/testdata/rstudio-responses/get-content.json", "r").read(),
-                adding_headers={"Content-Type": "application/json"},
-                status=200,
-            )
-            httpretty.register_uri(
-                httpretty.GET,
-                "https://api.posit.cloud/v1/content/1",
-                body=open("tests/testdata/rstudio-responses/create-output.json", "r").read(),
-                adding_headers={"Content-Type": "application/json"},
-                status=200,
+            _register_all(
+                [
+                    (
+                        httpretty.GET,
+                        "https://api.posit.cloud/v1/applications/444",
+                        _rstudio_response("get-project-application.json"),
+                        _JSON_RESPONSE,
+                    ),
+                    (
+                        httpretty.GET,
+                        "https://api.posit.cloud/v1/content/555",
+                        _rstudio_response("get-content.json"),
+                        _JSON_RESPONSE,
+                    ),
+                    (
+                        httpretty.GET,
+                        "https://api.posit.cloud/v1/content/1",
+                        _rstudio_response("create-output.json"),
+                        _JSON_RESPONSE,
+                    ),
+                ]
             )
 
         def post_output_callback(request, uri, response_headers):
@@ -323,108 +307,52 @@ class TestMain:
             return [
                 201,
                 {"Content-Type": "application/json"},
-                open("tests/testdata/rstudio-responses/create-output.json", "r").read(),
+                _rstudio_response("create-output.json"),
             ]
 
-        httpretty.register_uri(
-            httpretty.GET,
-            "https://api.posit.cloud/v1/applications/8442",
-            body=open("tests/testdata/rstudio-responses/get-output-application.json", "r").read(),
-            adding_headers={"Content-Type": "application/json"},
-            status=200,
-        )
-
-        httpretty.register_uri(
-            httpretty.POST,
-            "https://api.posit.cloud/v1/outputs/",
-            body=post_output_callback,
-        )
-
         def post_bundle_callback(request, uri, response_headers):
             parsed_request = _load_json(request.body)
             del parsed_request["checksum"]
             del parsed_request["content_length"]
             try:
-                assert parsed_request == {
-                    "application": 8442,
-                    "content_type": "application/x-tar",
-                }
+                assert parsed_request == _EXPECTED_POST_BUNDLE
             except AssertionError as e:
                 return _error_to_response(e)
             return [
                 201,
                 {"Content-Type": "application/json"},
-                open("tests/testdata/rstudio-responses/create-bundle.json", "r").read(),
+                _rstudio_response("create-bundle.json"),
             ]
 
-        httpretty.register_uri(
-            httpretty.POST,
-            "https://api.posit.cloud/v1/bundles",
-            body=post_bundle_callback,
-        )
-
-        httpretty.register_uri(
-            httpretty.PUT,
-            "https://lucid-uploads-staging.s3.amazonaws.com/bundles/application-8442/"
-            "6c9ed0d91ee9426687d9ac231d47dc83.tar.gz"
-            "?AWSAccessKeyId=theAccessKeyId"
-            "&Signature=dGhlU2lnbmF0dXJlCg%3D%3D"
-            "&content-md5=D1blMI4qTiI3tgeUOYXwkg%3D%3D"
-            "&content-type=application%2Fx-tar"
-            "&x-amz-security-token=dGhlVG9rZW4K"
-            "&Expires=1656715153",
-            body="",
-        )
-
         def post_bundle_status_callback(request, uri, response_headers):
             parsed_request = _load_json(request.body)
             try:
-                assert parsed_request == {"status": "ready"}
+                assert parsed_request == _EXPECTED_POST_BUNDLE_STATUS
             except AssertionError as e:
                 return _error_to_response(e)
-            return [303, {"Location": "https://api.posit.cloud/v1/bundles/12640"}, ""]
-
-        httpretty.register_uri(
-            httpretty.POST,
-            "https://api.posit.cloud/v1/bundles/12640/status",
-            body=post_bundle_status_callback,
-        )
-
-        httpretty.register_uri(
-            httpretty.GET,
-            "https://api.posit.cloud/v1/bundles/12640",
-            body=open("tests/testdata/rstudio-responses/get-accounts.json", "r").read(),
-            adding_headers={"Content-Type": "application/json"},
-            status=200,
-        )
+            return [303, {"Location": "https://api.posit.cloud/v1/bundles/12640"}, b""]
 
         def post_deploy_callback(request, uri, response_headers):
             parsed_request = _load_json(request.body)
             try:
-                assert parsed_request == {"bundle": 12640, "rebuild": False}
+                assert parsed_request == _EXPECTED_POST_DEPLOY
             except AssertionError as e:
                 return _error_to_response(e)
             return [
                 303,
                 {"Location": "https://api.posit.cloud/v1/tasks/333"},
-                open("tests/testdata/rstudio-responses/post-deploy.json", "r").read(),
+                _rstudio_response("post-deploy.json"),
             ]
 
-        httpretty.register_uri(
-            httpretty.POST,
-            "https://api.posit.cloud/v1/applications/8442/deploy",
-            body=post_deploy_callback,
-        )
-
-        httpretty.register_uri(
-            httpretty.GET,
-            "https://api.posit.cloud/v1/tasks/333",
-            body=open("tests/testdata/rstudio-responses/get-task.json", "r").read(),
-            adding_headers={"Content-Type": "application/json"},
-            status=200,
+        _register_all(
+            [
+                (httpretty.POST, "https://api.posit.cloud/v1/outputs/", post_output_callback, {}),
+                (httpretty.POST, "https://api.posit.cloud/v1/bundles", post_bundle_callback, {}),
+                (httpretty.POST, "https://api.posit.cloud/v1/bundles/12640/status", post_bundle_status_callback, {}),
+                (httpretty.POST, "https://api.posit.cloud/v1/applications/8442/deploy", post_deploy_callback, {}),
+            ]
         )
 
-        runner = CliRunner()
         args = [
             "deploy",
             "manifest",
@@ -440,140 +368,133 @@ class TestMain:
             "--title",
             "myApp",
         ]
-        try:
-            result = runner.invoke(cli, args)
-            assert result.exit_code == 0, result.output
-        finally:
-            if original_api_key_value:
-                os.environ["CONNECT_API_KEY"] = original_api_key_value
-            if original_server_value:
-                os.environ["CONNECT_SERVER"] = original_server_value
-            if project_application_id:
-                del os.environ["LUCID_APPLICATION_ID"]
-
-    def test_deploy_api(self):
+        result = runner.invoke(cli, args, catch_exceptions=False)
+        assert result.exit_code == 0, result.output
+
+    def test_deploy_api(self, runner):
         target = optional_target(get_api_path("flask"))
-        runner = CliRunner()
         args = self.create_deploy_args("api", target)
-        result = runner.invoke(cli, args)
+        result = runner.invoke(cli, args, catch_exceptions=False)
         assert result.exit_code == 0, result.output
 
-    def test_add_connect(self):
+    def test_add_connect(self, runner):
         connect_server = require_connect()
         api_key = require_api_key()
-        runner = CliRunner()
-        result = runner.invoke(cli, ["add", "--name", "my-connect", "--server", connect_server, "--api-key", api_key])
+        result = runner.invoke(
+            cli,
+            ["add", "--name", "my-connect", "--server", connect_server, "--api-key", api_key],
+            catch_exceptions=False,
+        )
         assert result.exit_code == 0, result.output
         assert "OK" in result.output
 
     @httpretty.activate(verbose=True, allow_net_connect=False)
-    def test_add_shinyapps(self):
-        original_api_key_value = os.environ.pop("CONNECT_API_KEY", None)
-        original_server_value = os.environ.pop("CONNECT_SERVER", None)
-        try:
-            httpretty.register_uri(
-                httpretty.GET, "https://api.shinyapps.io/v1/users/me", body='{"id": 1000}', status=200
-            )
+    def test_add_shinyapps(self, runner, monkeypatch):
+        monkeypatch.delenv("CONNECT_API_KEY", raising=False)
+        monkeypatch.delenv("CONNECT_SERVER", raising=False)
+        httpretty.register_uri(httpretty.GET, "https://api.shinyapps.io/v1/users/me", body='{"id": 1000}', status=200)
+
+        result = runner.invoke(
+            cli,
+            [
+                "add",
+                "--account",
+                "some-account",
+                "--name",
+                "my-shinyapps",
+                "--token",
+                "someToken",
+                "--secret",
+                "c29tZVNlY3JldAo=",
+            ],
+            catch_exceptions=False,
+        )
+        assert result.exit_code == 0, result.output
+        assert "shinyapps.io credential" in result.output
 
-            runner = CliRunner()
-            result = runner.invoke(
-                cli,
-                [
-                    "add",
-                    "--account",
-                    "some-account",
-                    "--name",
-                    "my-shinyapps",
-                    "--token",
-                    "someToken",
-                    "--secret",
-                    "c29tZVNlY3JldAo=",
-                ],
-            )
-            assert result.exit_code == 0, result.output
-            assert "shinyapps.io credential" in result.output
+    @httpretty.activate(verbose=True, allow_net_connect=False)
+    def test_add_cloud(self, runner, monkeypatch):
+        monkeypatch.delenv("CONNECT_API_KEY", raising=False)
+        monkeypatch.delenv("CONNECT_SERVER", raising=False)
+        httpretty.register_uri(httpretty.GET, "https://api.posit.cloud/v1/users/me", body='{"id": 1000}', status=200)
+
+        result = runner.invoke(
+            cli,
+            [
+                "add",
+                "--name",
+                "my-cloud",
+                "--token",
+                "someToken",
+                "--secret",
+                "c29tZVNlY3JldAo=",
+                "--server",
+                "rstudio.cloud",
+            ],
+            catch_exceptions=False,
+        )
+        assert result.exit_code == 0, result.output
+        assert "Posit Cloud credential" in result.output
 
-        finally:
-            if original_api_key_value:
-                os.environ["CONNECT_API_KEY"] = original_api_key_value
-            if original_server_value:
-                os.environ["CONNECT_SERVER"] = original_server_value
+    def test_add_shinyapps_missing_options(self, runner, monkeypatch):
+        monkeypatch.delenv("CONNECT_API_KEY", raising=False)
+        monkeypatch.delenv("CONNECT_SERVER", raising=False)
+        result = runner.invoke(
+            cli,
+            [
+                "add",
+                "--name",
+                "my-shinyapps",
+                "--token",
+                "someToken",
+            ],
+        )
+        assert result.exit_code == 1, result.output
+        assert (
+            str(result.exception) == "-A/--account, -T/--token, and -S/--secret must all be provided for shinyapps.io."
+        )
 
-    @httpretty.activate(verbose=True, allow_net_connect=False)
-    def test_add_cloud(self):
-        original_api_key_value = os.environ.pop("CONNECT_API_KEY", None)
-        original_server_value = os.environ.pop("CONNECT_SERVER", None)
-        try:
-            httpretty.register_uri(
-                httpretty.GET, "https://api.posit.cloud/v1/users/me", body='{"id": 1000}', status=200
-            )
 
-            runner = CliRunner()
-            result = runner.invoke(
-                cli,
-                [
-                    "add",
-                    "--name",
-                    "my-cloud",
-                    "--token",
-                    "someToken",
-                    "--secret",
-                    "c29tZVNlY3JldAo=",
-                    "--server",
-                    "rstudio.cloud",
-                ],
-            )
-            assert result.exit_code == 0, result.output
-            assert "Posit Cloud credential" in result.output
-
-        finally:
-            if original_api_key_value:
-                os.environ["CONNECT_API_KEY"] = original_api_key_value
-            if original_server_value:
-                os.environ["CONNECT_SERVER"] = original_server_value
-
-    def test_add_shinyapps_missing_options(self):
-        original_api_key_value = os.environ.pop("CONNECT_API_KEY", None)
-        original_server_value = os.environ.pop("CONNECT_SERVER", None)
-        try:
-            runner = CliRunner()
-            result = runner.invoke(
-                cli,
-                [
-                    "add",
-                    "--name",
-                    "my-shinyapps",
-                    "--token",
-                    "someToken",
-                ],
-            )
-            assert result.exit_code == 1, result.output
-            assert (
-                str(result.exception)
-                == "-A/--account, -T/--token, and -S/--secret must all be provided for shinyapps.io."
-            )
-        finally:
-            if original_api_key_value:
-                os.environ["CONNECT_API_KEY"] = original_api_key_value
-            if original_server_value:
-                os.environ["CONNECT_SERVER"] = original_server_value
-
-
-class TestBootstrap(TestCase):
-    def setUp(self):
-        self.mock_server = "http://localhost:8080"
-        self.mock_uri = "http://localhost:8080/__api__/v1/experimental/bootstrap"
-        self.jwt_keypath = "tests/testdata/jwt/secret.key"
-        self.jwt_env_secret = "MTIzNDU2Nzg5MDEyMzQ1Njc4OTAxMjM0NTY3ODkwMTIzNDU="
-
-        self.default_cli_args = [
-            "bootstrap",
-            "--server",
-            self.mock_server,
-            "--jwt-keypath",
-            self.jwt_keypath,
-            "--insecure",
-        ]
+@pytest.fixture(scope="class")
+def httpretty_per_class():
+    """
+    Enables httpretty once for a whole test class rather than once per test. Tests are responsible for resetting and
+    registering the responses they need.
+    """
+    httpretty.enable(verbose=True, allow_net_connect=False)
+    yield
+    httpretty.disable()
+    httpretty.reset()
+
+
+@pytest.mark.usefixtures("httpretty_per_class")
+class TestBootstrap:
+    @classmethod
+    def setup_class(cls):
+        cls.mock_server = "http://localhost:8080"
+        cls.mock_uri = "http://localhost:8080/__api__/v1/experimental/bootstrap"
+        cls.jwt_keypath = _BOOTSTRAP_KEYPATH
+        # the same secret as it would be provided via the environment variable
+        cls.jwt_env_secret = "MTIzNDU2Nzg5MDEyMzQ1Njc4OTAxMjM0NTY3ODkwMTIzNDU="
+
+        # argv shared by every bootstrap invocation; tests add the key source and output options they need
+        cls.base_cli_args = ["bootstrap", "--server", cls.mock_server, "--insecure"]
+        cls.default_cli_args = cls.base_cli_args + ["--jwt-keypath", cls.jwt_keypath]
+
+    @staticmethod
+    def call_bootstrap(server, jwt_keypath=None, insecure=False, cacert=None, raw=False, verbose=False):
+        """
+        Calls the bootstrap command's callback directly, skipping Click's argument parsing and context setup.
+        """
+        return cli.commands["bootstrap"].callback(
+            server=server, insecure=insecure, cacert=cacert, jwt_keypath=jwt_keypath, raw=raw, verbose=verbose
+        )
+
+    def register_bootstrap_response(self, status, json_data):
+        httpretty.reset()
+        httpretty.register_uri(
+            httpretty.POST, self.mock_uri, body=self.create_bootstrap_mock_callback(status, json_data)
+        )
 
     def create_bootstrap_mock_callback(self, status, json_data):
         def request_callback(request, uri, response_headers):
@@ -581,274 +502,149 @@ class TestBootstrap(TestCase):
             # verify auth header is sent correctly
             authorization = request.headers.get("Authorization")
             auth_split = authorization.split(" ")
-            self.assertEqual(len(auth_split), 2)
-            self.assertEqual(auth_split[0], "Connect-Bootstrap")
-            self.assertTrue(has_jwt_structure(auth_split[1]))
+            assert len(auth_split) == 2
+            assert auth_split[0] == "Connect-Bootstrap"
+            assert has_jwt_structure(auth_split[1])
 
             # verify uri
-            self.assertEqual(uri, self.mock_uri)
+            assert uri == self.mock_uri
 
-            return [status, {"Content-Type": "application/json"}, json.dumps(json_data)]
+            return [status, {"Content-Type": "application/json"}, orjson.dumps(json_data).decode()]
 
         return request_callback
 
-    @httpretty.activate(verbose=True, allow_net_connect=False)
-    def test_bootstrap(self):
+    def test_bootstrap(self, runner):
         """
         Normal initial-admin operation
         """
 
-        callback = self.create_bootstrap_mock_callback(200, {"api_key": "testapikey123"})
-
-        httpretty.register_uri(
-            httpretty.POST,
-            self.mock_uri,
-            body=callback,
-        )
+        self.register_bootstrap_response(200, {"api_key": "testapikey123"})
 
-        runner = CliRunner()
-        result = runner.invoke(cli, self.default_cli_args)
+        result = runner.invoke(cli, self.default_cli_args, catch_exceptions=False)
 
-        self.assertEqual(result.exit_code, 0, result.output)
+        assert result.exit_code == 0, result.output
 
-        json_output = json.loads(result.output)
-        expected_output = json.loads(open("tests/testdata/initial-admin-responses/success.json", "r").read())
-        self.assertEqual(json_output, expected_output)
+        json_output = _load_json(result.stdout)
+        expected_output = load_bootstrap_response("success")
+        assert json_output == expected_output
 
-    @httpretty.activate(verbose=True, allow_net_connect=False)
-    def test_bootstrap_env_var(self):
+    def test_bootstrap_env_var(self, runner, mocker):
         """
         Normal initial-admin operation if secret key is configured using an environment variable
         """
-        cli_args = [
-            "bootstrap",
-            "--server",
-            self.mock_server,
-            "--insecure",
-        ]
-
-        callback = self.create_bootstrap_mock_callback(200, {"api_key": "testapikey123"})
-
-        httpretty.register_uri(
-            httpretty.POST,
-            self.mock_uri,
-            body=callback,
-        )
-
-        os.environ[SECRET_KEY_ENV] = self.jwt_env_secret
-
-        runner = CliRunner()
-        result = runner.invoke(cli, cli_args)
-
-        self.assertEqual(result.exit_code, 0, result.output)
-
-        json_output = json.loads(result.output)
-        expected_output = json.loads(open("tests/testdata/initial-admin-responses/success.json", "r").read())
-        self.assertEqual(json_output, expected_output)
-
-        del os.environ[SECRET_KEY_ENV]
-
-    @httpretty.activate(verbose=True, allow_net_connect=False)
-    def test_bootstrap_misc_error(self):
-        """
-        Fail reasonably if response indicates some non-standard error
-        """
-
-        callback = self.create_bootstrap_mock_callback(500, {})
-
-        httpretty.register_uri(
-            httpretty.POST,
-            self.mock_uri,
-            body=callback,
-        )
-
-        runner = CliRunner()
-        result = runner.invoke(cli, self.default_cli_args)
-
-        self.assertEqual(result.exit_code, 0, result.output)
-
-        json_output = json.loads(result.output)
-        expected_output = json.loads(open("tests/testdata/initial-admin-responses/other_error.json", "r").read())
-        self.assertEqual(json_output, expected_output)
-
-    @httpretty.activate(verbose=True, allow_net_connect=False)
-    def test_bootstrap_not_found_error(self):
-        """
-        Fail reasonablly if response indicates 404 not found
-        """
-
-        callback = self.create_bootstrap_mock_callback(404, {})
-
-        httpretty.register_uri(
-            httpretty.POST,
-            self.mock_uri,
-            body=callback,
-        )
-
-        runner = CliRunner()
-        result = runner.invoke(cli, self.default_cli_args)
-
-        self.assertEqual(result.exit_code, 0, result.output)
-
-        json_output = json.loads(result.output)
-        expected_output = json.loads(open("tests/testdata/initial-admin-responses/not_found_error.json", "r").read())
-        self.assertEqual(json_output, expected_output)
-
-    @httpretty.activate(verbose=True, allow_net_connect=False)
-    def test_bootstrap_forbidden_error(self):
-        """
-        Fail reasonably if response indicates a forbidden error
-        """
-
-        callback = self.create_bootstrap_mock_callback(403, {})
+        self.register_bootstrap_response(200, {"api_key": "testapikey123"})
 
-        httpretty.register_uri(
-            httpretty.POST,
-            self.mock_uri,
-            body=callback,
+        # test_bootstrap covers the full output; here it's enough that the env secret is what signs the token
+        token_generator = mocker.patch("rsconnect.main.TokenGenerator", wraps=TokenGenerator)
+        result = runner.invoke(
+            cli, self.base_cli_args, env={SECRET_KEY_ENV: self.jwt_env_secret}, catch_exceptions=False
         )
 
-        runner = CliRunner()
-        result = runner.invoke(cli, self.default_cli_args)
-
-        self.assertEqual(result.exit_code, 0, result.output)
-        json_output = json.loads(result.output)
-        expected_output = json.loads(open("tests/testdata/initial-admin-responses/forbidden_error.json", "r").read())
-
-        self.assertEqual(json_output, expected_output)
+        assert result.exit_code == 0, result.output
+        token_generator.assert_called_once_with(b"12345678901234567890123456789012345")
 
-    @httpretty.activate(verbose=True, allow_net_connect=False)
-    def test_bootstrap_unauthorized(self):
+    @pytest.mark.parametrize(
+        "status,expected_fixture",
+        [
+            (500, "other_error"),
+            (404, "not_found_error"),
+            (403, "forbidden_error"),
+            (401, "unauthorized_error"),
+        ],
+        ids=["misc error", "not found", "forbidden", "unauthorized"],
+    )
+    def test_bootstrap_error(self, status, expected_fixture):
         """
-        Fail reasonably if response indicates that request is unauthorized
+        Fail reasonably if response indicates an error
         """
 
-        callback = self.create_bootstrap_mock_callback(401, {})
+        self.register_bootstrap_response(status, {})
 
-        httpretty.register_uri(
-            httpretty.POST,
-            self.mock_uri,
-            body=callback,
-        )
-
-        runner = CliRunner()
-        result = runner.invoke(cli, self.default_cli_args)
+        output = _bootstrap(self.mock_server, insecure=True, cacert=None, jwt_keypath=self.jwt_keypath)
 
-        self.assertEqual(result.exit_code, 0, result.output)
+        assert output == load_bootstrap_response(expected_fixture)
 
-        json_output = json.loads(result.output)
-        expected_output = json.loads(open("tests/testdata/initial-admin-responses/unauthorized_error.json", "r").read())
-
-        self.assertEqual(json_output, expected_output)
-
-    def test_bootstrap_help(self):
+    def test_bootstrap_help(self, runner):
         """
         Help parameter should complete without erroring
         """
 
-        runner = CliRunner()
-        result = runner.invoke(cli, ["bootstrap", "--help"])
-        self.assertEqual(result.exit_code, 0, result.output)
+        result = runner.invoke(cli, ["bootstrap", "--help"], catch_exceptions=False)
+        assert result.exit_code == 0, result.output
 
-    def test_boostrap_invalid_jwt_path(self):
+    def test_boostrap_invalid_jwt_path(self, runner):
         """
         Fail reasonably if jwt does not exist at provided path
         """
 
-        runner = CliRunner()
         result = runner.invoke(cli, ["bootstrap", "--server", "http://host:port", "--jwt-keypath", "this/is/invalid"])
-        self.assertEqual(result.exit_code, 1, result.output)
-        self.assertEqual(result.output, "Error: Keypath does not exist.\n")
+        assert result.exit_code == 1, result.output
+        assert result.stdout == "Error: Keypath does not exist.\n"
 
-    def test_bootstrap_invalid_server(self):
-        """
-        Fail reasonably if server URL is formatted incorrectly
-        """
-
-        runner = CliRunner()
-        result = runner.invoke(cli, ["bootstrap", "--server", "123.some.ip.address", "--jwt-keypath", self.jwt_keypath])
-        self.assertEqual(result.exit_code, 1, result.output)
-        self.assertEqual(
-            result.output, "Error: Server URL expected to begin with transfer protocol (ex. http/https).\n"
-        )
-
-    def test_boostrap_missing_jwt_option(self):
-        """
-        If jwt keyfile is not specified, it needs to be set using an environment variable
-        """
-        runner = CliRunner()
-        result = runner.invoke(cli, ["bootstrap", "--server", "http://a_server"])
-        self.assertEqual(result.exit_code, 1, result.output)
-        self.assertEqual(
-            result.output, "Error: Must specify secret key using either a keyfile or environment variable.\n"
-        )
-
-    def test_bootstrap_conflicting_jwt_option(self):
-        """
-        If jwt keyfile is specified, it cannot also be set using an environment variable
-        """
-
-        os.environ[SECRET_KEY_ENV] = "a_value"
-        runner = CliRunner()
-        result = runner.invoke(cli, self.default_cli_args)
-        self.assertEqual(result.exit_code, 1, result.output)
-        self.assertEqual(
-            result.output, "Error: Cannot specify secret key using both a keyfile and environment variable.\n"
-        )
-
-        del os.environ[SECRET_KEY_ENV]
-
-    def test_bootstrap_invalid_env_secret_key(self):
+    @pytest.mark.parametrize(
+        "kwargs,env_secret,expected_error",
+        [
+            (
+                dict(server="123.some.ip.address", jwt_keypath=_BOOTSTRAP_KEYPATH),
+                None,
+                "Server URL expected to begin with transfer protocol (ex. http/https).",
+            ),
+            (
+                dict(server="http://a_server"),
+                None,
+                "Must specify secret key using either a keyfile or environment variable.",
+            ),
+            (
+                dict(server="http://localhost:8080", jwt_keypath=_BOOTSTRAP_KEYPATH, insecure=True),
+                "a_value",
+                "Cannot specify secret key using both a keyfile and environment variable.",
+            ),
+            (
+                dict(server="http://a_server"),
+                "a_value",
+                "Unable to decode base64 data from environment variable: CONNECT_BOOTSTRAP_SECRETKEY",
+            ),
+        ],
+        ids=["invalid server", "missing jwt option", "conflicting jwt option", "invalid env secret key"],
+    )
+    def test_bootstrap_invalid_arguments(self, monkeypatch, capsys, kwargs, env_secret, expected_error):
         """
-        If jwt env variable is specified, it needs to be a valid base64-encoded value
+        Fail reasonably if the server URL or secret key configuration is invalid
         """
 
-        os.environ[SECRET_KEY_ENV] = "a_value"
-        runner = CliRunner()
-        result = runner.invoke(cli, ["bootstrap", "--server", "http://a_server"])
-        self.assertEqual(result.exit_code, 1, result.output)
-        self.assertEqual(
-            result.output,
-            "Error: Unable to decode base64 data from environment variable: CONNECT_BOOTSTRAP_SECRETKEY\n",
-        )
+        if env_secret is None:
+            monkeypatch.delenv(SECRET_KEY_ENV, raising=False)
+        else:
+            monkeypatch.setenv(SECRET_KEY_ENV, env_secret)
 
-        del os.environ[SECRET_KEY_ENV]
+        with pytest.raises(SystemExit) as exc_info:
+            self.call_bootstrap(**kwargs)
+        assert exc_info.value.code == 1
+        assert capsys.readouterr().out == "Error: " + expected_error + "\n"
 
-    @httpretty.activate(verbose=True, allow_net_connect=False)
-    def test_bootstrap_raw_output(self):
+    def test_bootstrap_raw_output(self, runner):
         """
         Verify we can get the API key as raw output
         """
 
         expected_api_key = "apikey123"
-        callback = self.create_bootstrap_mock_callback(200, {"api_key": expected_api_key})
+        self.register_bootstrap_response(200, {"api_key": expected_api_key})
 
-        httpretty.register_uri(
-            httpretty.POST,
-            self.mock_uri,
-            body=callback,
-        )
-
-        runner = CliRunner()
-        result = runner.invoke(cli, self.default_cli_args + ["--raw"])
+        result = runner.invoke(cli, self.default_cli_args + ["--raw"], catch_exceptions=False)
 
-        self.assertEqual(result.exit_code, 0, result.output)
+        assert result.exit_code == 0, result.output
 
-        self.assertEqual(result.output, expected_api_key + "\n")
+        assert result.stdout == expected_api_key + "\n"
 
-    @httpretty.activate(verbose=True, allow_net_connect=False)
-    def test_boostrap_raw_output_nonsuccess(self):
+    def test_boostrap_raw_output_nonsuccess(self, runner):
         """
         Verify behavior on non-200 response
         """
 
-        callback = self.create_bootstrap_mock_callback(500, {})
-
-        httpretty.register_uri(httpretty.POST, self.mock_uri, body=callback)
+        self.register_bootstrap_response(500, {})
 
-        runner = CliRunner()
-        result = runner.invoke(cli, self.default_cli_args + ["--raw"])
+        result = runner.invoke(cli, self.default_cli_args + ["--raw"], catch_exceptions=False)
 
-        self.assertEqual(result.exit_code, 0, result.output)
+        assert result.exit_code == 0, result.output
 
-        self.assertEqual(result.output, "\n")
+        assert result.stdout == "\n"
@@ -1,6 +1,8 @@
+import functools
 import sys
 import os
 import jwt
+import orjson
 import re
 from os.path import join, dirname, exists
 
@@ -66,6 +68,16 @@ def get_api_path(name, parent="api"):
     return path
 
 
+@functools.lru_cache(maxsize=None)
+def load_bootstrap_response(name):
+    """
+    Load one of the expected bootstrap outputs from testdata/initial-admin-responses. The result is shared between
+    callers, so treat it as read-only.
+    """
+    with open(join(dirname(__file__), "testdata", "initial-admin-responses", name + ".json"), "rb") as f:
+        return orjson.loads(f.read())
+
+
 def has_jwt_structure(token):
     """
     Verify that token is a well-formatted JWT string